@@ -1,11 +1,56 @@
-import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
+import ijson
+import orjson
+import pyarrow as pa
 from torch.utils.data import Dataset
 
 from app.ollama.models import ELTagExtend
 
+_REQUIRED_TAG_KEYS = frozenset({"text", "beginIndex", "endIndex", "uri"})
+_SOURCE_FILES_KEY = b"source_files"
+_READ_BUFFER_SIZE = 64 * 1024
+_STREAMING_THRESHOLD = 64 * 1024 * 1024
+
+_TAG_TYPE = pa.struct([
+    ("text", pa.string()),
+    ("uri", pa.string()),
+    ("beginIndex", pa.int32()),
+    ("endIndex", pa.int32()),
+])
+_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("corpus", pa.string()),
+    ("source_file", pa.string()),
+    ("ground_truth", pa.list_(_TAG_TYPE)),
+])
+
+
+def _iter_json_records(file_path: Path) -> Iterator:
+    """
+    Iterate over the elements of the top-level JSON array in a file.
+    
+    Files below _STREAMING_THRESHOLD are decoded in one go with orjson.
+    Larger files are stream-parsed with ijson, so only one record is held
+    in memory at a time instead of the whole document.
+    """
+    if file_path.stat().st_size < _STREAMING_THRESHOLD:
+        yield from orjson.loads(file_path.read_bytes())
+        return
+    
+    with open(file_path, "rb", buffering=_READ_BUFFER_SIZE) as f:
+        yield from ijson.items(f, "item", buf_size=_READ_BUFFER_SIZE)
+
+
+def _source_files_tag(json_files: list[Path]) -> bytes:
+    """Names of the JSON files a cache was built from, as stored in its schema metadata."""
+    return orjson.dumps(sorted(json_file.name for json_file in json_files))
+
 
 class EntityLinkingDataset(Dataset):
     """
@@ -13,63 +58,161 @@ class EntityLinkingDataset(Dataset):
     
     Loads JSON files containing corpus text and ground truth entity tags.
     Each item contains the original text and its associated entity annotations.
+    Items are stored column-wise in a single Arrow RecordBatch and only turned
+    into Python objects when accessed.
     
     Args:
         json_path: Path to a JSON file or directory containing JSON files.
         dataset_name: Optional name for the dataset (defaults to filename).
+        num_workers: Number of threads used to load a directory of JSON files
+            (defaults to one per file, capped at 32).
+        as_objects: Whether items return ground truth as ELTagExtend objects
+            (True) or as plain dicts (False).
+        eager: Whether to build the ELTagExtend objects for every item at load
+            time instead of on first access.
+        use_cache: Whether to cache the parsed data as an Arrow IPC (Feather)
+            file next to the source and memory-map it on later loads.
     """
     
     def __init__(
         self, 
         json_path: Union[str, Path], 
-        dataset_name: Optional[str] = None
+        dataset_name: Optional[str] = None,
+        num_workers: Optional[int] = None,
+        as_objects: bool = True,
+        eager: bool = False,
+        use_cache: bool = True
     ) -> None:
         self.json_path = Path(json_path)
         self.dataset_name = dataset_name or self.json_path.stem
-        self.data: list[dict] = []
+        self.num_workers = num_workers
+        self.as_objects = as_objects
+        self.use_cache = use_cache
         
         self._load_data()
+        
+        self._materialized: list[Optional[list[ELTagExtend]]] = [None] * len(self)
+        if eager:
+            ground_truth = self._batch.column("ground_truth").to_pylist()
+            for idx, raw_tags in enumerate(ground_truth):
+                self._materialize_tags(idx, raw_tags)
+    
+    @property
+    def batch(self) -> pa.RecordBatch:
+        """Underlying Arrow RecordBatch, for zero-copy access to the columns."""
+        return self._batch
+    
+    @property
+    def cache_path(self) -> Path:
+        """Location of the Feather cache for this dataset."""
+        if self.json_path.is_dir():
+            return self.json_path / f"{self.json_path.name}.feather"
+        return self.json_path.with_suffix(".feather")
     
     def _load_data(self) -> None:
-        """Load data from JSON file(s)."""
+        """Load data from the Feather cache if it is fresh, otherwise from JSON file(s)."""
         if self.json_path.is_file():
-            self._load_json_file(self.json_path)
+            json_files = [self.json_path]
         elif self.json_path.is_dir():
-            for json_file in sorted(self.json_path.glob("*.json")):
-                self._load_json_file(json_file)
+            json_files = sorted(self.json_path.glob("*.json"))
         else:
             raise FileNotFoundError(f"Path not found: {self.json_path}")
+        
+        if self.use_cache and self._is_cache_fresh(json_files):
+            cached = self._read_cache(json_files)
+            if cached is not None:
+                self._batch = cached
+                return
+        
+        if len(json_files) == 1:
+            items = self._load_json_file(json_files[0])
+        else:
+            max_workers = self.num_workers or min(32, max(len(json_files), 1))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(self._load_json_file, json_files)
+                items = list(chain.from_iterable(results))
+        
+        self._batch = pa.RecordBatch.from_pylist(items, schema=_SCHEMA)
+        
+        if self.use_cache:
+            self._write_cache(json_files)
+    
+    def _is_cache_fresh(self, json_files: list[Path]) -> bool:
+        """
+        Check that the cache exists and is newer than every source file.
+        
+        Added or removed JSON files are detected by :meth:`_read_cache`, which
+        compares the source file names recorded in the cache.
+        """
+        cache_path = self.cache_path
+        if not cache_path.is_file():
+            return False
+        
+        cache_mtime = cache_path.stat().st_mtime
+        return all(source.stat().st_mtime <= cache_mtime for source in json_files)
     
-    def _load_json_file(self, file_path: Path) -> None:
-        """Load a single JSON file."""
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = json.load(f)
+    def _read_cache(self, json_files: list[Path]) -> Optional[pa.RecordBatch]:
+        """
+        Memory-map the Feather cache.
         
-        for idx, item in enumerate(content):
+        The file is written uncompressed, so the returned batch references
+        the mapped pages directly instead of copying them. Returns None if
+        the cache is unreadable, was written with a different schema or was
+        built from a different set of JSON files.
+        """
+        try:
+            with pa.memory_map(str(self.cache_path)) as source:
+                reader = pa.ipc.open_file(source)
+                if not reader.schema.equals(_SCHEMA) or reader.num_record_batches != 1:
+                    return None
+                metadata = reader.schema.metadata or {}
+                if metadata.get(_SOURCE_FILES_KEY) != _source_files_tag(json_files):
+                    return None
+                return reader.get_batch(0)
+        except (OSError, pa.ArrowInvalid):
+            return None
+    
+    def _write_cache(self, json_files: list[Path]) -> None:
+        """Write the loaded batch to the Feather cache, skipping it if the location is not writable."""
+        cache_path = self.cache_path
+        tmp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+        schema = _SCHEMA.with_metadata({_SOURCE_FILES_KEY: _source_files_tag(json_files)})
+        try:
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with pa.ipc.new_file(sink, schema) as writer:
+                    writer.write_batch(self._batch)
+            tmp_path.replace(cache_path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+    
+    def _load_json_file(self, file_path: Path) -> list[dict]:
+        """Load a single JSON file and return its items."""
+        items = []
+        for idx, item in enumerate(_iter_json_records(file_path)):
             if not item or "corpus" not in item:
                 continue
 
             ground_truth_tags = []
             for tag in item.get("tags", []):
-                if all(k in tag for k in ["text", "beginIndex", "endIndex", "uri"]):
-                    ground_truth_tags.append(
-                        ELTagExtend(
-                            text=tag["text"],
-                            uri=tag["uri"],
-                            beginIndex=tag["beginIndex"],
-                            endIndex=tag["endIndex"]
-                        )
-                    )
+                if tag.keys() >= _REQUIRED_TAG_KEYS:
+                    ground_truth_tags.append({
+                        "text": tag["text"],
+                        "uri": tag["uri"],
+                        "beginIndex": tag["beginIndex"],
+                        "endIndex": tag["endIndex"]
+                    })
             
-            self.data.append({
+            items.append({
                 "id": f"{file_path.stem}_{idx}",
                 "corpus": item["corpus"],
                 "ground_truth": ground_truth_tags,
                 "source_file": file_path.name
             })
+        
+        return items
     
     def __len__(self) -> int:
-        return len(self.data)
+        return self._batch.num_rows
     
     def __getitem__(self, idx: int) -> dict:
         """
@@ -79,14 +222,33 @@ class EntityLinkingDataset(Dataset):
             dict with keys:
                 - id: Unique identifier for the sample
                 - corpus: The original text
-                - ground_truth: List of ELTagExtend objects (ground truth annotations)
+                - ground_truth: List of ELTagExtend objects (ground truth annotations),
+                  or plain dicts when ``as_objects`` is False
                 - source_file: Name of the source JSON file
         """
-        return self.data[idx]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("dataset index out of range")
+        
+        item = self._batch.slice(idx, 1).to_pylist()[0]
+        if self.as_objects:
+            item["ground_truth"] = self._materialize_tags(idx, item["ground_truth"])
+        return item
+    
+    def _materialize_tags(self, idx: int, raw_tags: list[dict]) -> list[ELTagExtend]:
+        """Build the ELTagExtend objects for an item once and reuse them afterwards."""
+        tags = self._materialized[idx]
+        if tags is None:
+            tags = self._materialized[idx] = [
+                ELTagExtend(tag["text"], tag["uri"], tag["beginIndex"], tag["endIndex"])
+                for tag in raw_tags
+            ]
+        return tags
     
     def get_all_texts(self) -> list[str]:
         """Get all corpus texts for batch processing."""
-        return [item["corpus"] for item in self.data]
+        return self._batch.column("corpus").to_pylist()
     
     def get_batch(self, start_idx: int, batch_size: int) -> list[dict]:
         """
@@ -99,25 +261,88 @@ class EntityLinkingDataset(Dataset):
         Returns:
             List of dataset items
         """
-        end_idx = min(start_idx + batch_size, len(self.data))
-        return [self.data[i] for i in range(start_idx, end_idx)]
+        end_idx = min(start_idx + batch_size, len(self))
+        if start_idx >= end_idx:
+            return []
+        
+        items = self._batch.slice(start_idx, end_idx - start_idx).to_pylist()
+        if self.as_objects:
+            for idx, item in enumerate(items, start=start_idx):
+                item["ground_truth"] = self._materialize_tags(idx, item["ground_truth"])
+        return items
+    
+    def iter_batches(self, batch_size: int, prefetch: int = 2) -> Iterator[list[dict]]:
+        """
+        Iterate over the dataset in batches, prefetching on a background thread.
+        
+        Up to ``prefetch`` upcoming batches are assembled while the caller
+        processes the current one.
+        
+        Args:
+            batch_size: Number of items per batch
+            prefetch: Maximum number of batches prepared ahead of the consumer
+            
+        Yields:
+            Lists of dataset items
+        """
+        batches: queue.Queue = queue.Queue(maxsize=max(prefetch, 1))
+        stop = threading.Event()
+        done = object()
+        
+        def put(value) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(value, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce() -> None:
+            try:
+                for start_idx in range(0, len(self), batch_size):
+                    if not put(self.get_batch(start_idx, batch_size)):
+                        return
+            except Exception as e:
+                put(e)
+            put(done)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while (batch := batches.get()) is not done:
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            producer.join()
 
 
-def load_all_datasets(jsons_dir: Union[str, Path]) -> dict[str, EntityLinkingDataset]:
+def load_all_datasets(
+    jsons_dir: Union[str, Path],
+    num_workers: Optional[int] = None
+) -> dict[str, EntityLinkingDataset]:
     """
     Load all JSON datasets from a directory.
     
     Args:
         jsons_dir: Path to directory containing JSON files
+        num_workers: Number of datasets loaded concurrently
+            (defaults to one per file, capped at 32)
         
     Returns:
         Dictionary mapping dataset names to EntityLinkingDataset instances
     """
     jsons_dir = Path(jsons_dir)
-    datasets = {}
-    
-    for json_file in sorted(jsons_dir.glob("*.json")):
-        dataset_name = json_file.stem
-        datasets[dataset_name] = EntityLinkingDataset(json_file, dataset_name)
+    json_files = sorted(jsons_dir.glob("*.json"))
+    if not json_files:
+        return {}
     
-    return datasets
+    max_workers = num_workers or min(32, len(json_files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        loaded = executor.map(
+            lambda json_file: EntityLinkingDataset(json_file, json_file.stem),
+            json_files
+        )
+        return {dataset.dataset_name: dataset for dataset in loaded}
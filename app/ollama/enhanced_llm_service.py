@@ -1,12 +1,15 @@
+import asyncio
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Literal, Optional
 
+import httpx
 import ollama
 from tqdm import tqdm
 
 from app.ollama.models import ELTagExtend, ELTagList
 from app.ollama.llm_service import OllamaGPT
+from app.ollama.tag_matching import find_tag_offsets, strip_entity_markers
 from app.prompts.enhanced_ollamagpt import (
     ner_system_prompt,
     ner_user_prompt,
@@ -16,6 +19,17 @@ from app.prompts.enhanced_ollamagpt import (
     combined_user_prompt,
 )
 
+_ELTAGLIST_SCHEMA = ELTagList.model_json_schema()
+_VALIDATE = ELTagList.model_validate_json
+_TRANSIENT_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed request is worth retrying (network, timeout or server-side error)."""
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, _TRANSIENT_ERRORS)
+
 
 class EnhancedOllamaGPT(OllamaGPT):
     """
@@ -26,17 +40,61 @@ class EnhancedOllamaGPT(OllamaGPT):
     - More structured prompts
     - Option for combined NER+EL in single call (fewer API calls)
     - Better error handling and logging
+    - Asynchronous batch processing over a single shared client
+    - Model and prompt cache kept warm on the server across requests
+    
+    Args:
+        name: Ollama model name.
+        max_retries: Number of attempts per request.
+        retry_delay: Base delay between attempts in seconds (doubled after each
+            failed attempt of an async request).
+        host: Ollama server to pin all requests to (defaults to OLLAMA_HOST).
+        keep_alive: How long the server keeps the model loaded between requests.
+        num_ctx: Context size. It is identical for every request, so the server
+            never reloads the model and can reuse its prompt cache.
+        warmup: Whether to load the model and process the combined system
+            prompt with a one-token request on construction.
+        max_connections: Size of the HTTP connection pool shared by all
+            requests; idle connections are kept alive for reuse.
     """
     
     def __init__(
         self, 
         name: str, 
         max_retries: int = 3,
-        retry_delay: float = 1.0
+        retry_delay: float = 1.0,
+        host: Optional[str] = None,
+        keep_alive: str = "30m",
+        num_ctx: int = 4096,
+        warmup: bool = True,
+        max_connections: int = 64
     ) -> None:
-        super().__init__(name)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=30
+        )
+        super().__init__(name, client=ollama.Client(host=host, limits=self.limits))
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.host = host
+        self.keep_alive = keep_alive
+        self.options = {"num_ctx": num_ctx}
+        self._aclient: Optional[ollama.AsyncClient] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        if warmup:
+            self._warmup()
+    
+    def _warmup(self) -> None:
+        """Load the model and process the combined system prompt once."""
+        self._call_with_retry(
+            self.client.chat,
+            model=self.name,
+            messages=[{"role": "system", "content": combined_system_prompt}],
+            keep_alive=self.keep_alive,
+            options={**self.options, "num_predict": 1}
+        )
     
     def _call_with_retry(
         self, 
@@ -55,67 +113,135 @@ class EnhancedOllamaGPT(OllamaGPT):
                     time.sleep(self.retry_delay * (attempt + 1))
         raise last_error
     
-    def run_combined_ner_and_linking(self, text: str) -> list[ELTagExtend]:
+    def _get_async_client(self) -> ollama.AsyncClient:
         """
-        Run NER and entity linking in a single LLM call.
+        Return the async client bound to the running event loop.
         
-        This approach is more efficient as it requires only one API call,
-        and the model can use context from NER to inform linking decisions.
+        The client is reused for every request made from the same loop so
+        HTTP connections are kept alive, and recreated if a new loop is used.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = ollama.AsyncClient(host=self.host, limits=self.limits)
+            self._aclient_loop = loop
+        return self._aclient
+    
+    async def aclose(self) -> None:
+        """
+        Close the async client's connection pool.
         
-        Args:
-            text: Input text to process
-            
-        Returns:
-            List of ELTagExtend objects with entity info and Wikipedia URIs
+        Must be awaited on the event loop that issued the requests. A later
+        async call opens a fresh client.
+        """
+        if self._aclient is not None:
+            await self._aclient.close()
+            self._aclient = None
+            self._aclient_loop = None
+    
+    async def _acall_with_retry(self, **kwargs) -> dict:
         """
-        response = self._call_with_retry(
-            ollama.chat,
+        Execute an async chat call, retrying transient failures.
+        
+        The delay doubles after every attempt. Only the failing request waits,
+        so the other requests of a batch keep running during the backoff.
+        """
+        client = self._get_async_client()
+        for attempt in range(self.max_retries):
+            try:
+                return await client.chat(**kwargs)
+            except Exception as e:
+                if attempt == self.max_retries - 1 or not _is_transient(e):
+                    raise
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+    
+    def _combined_request(self, text: str) -> dict:
+        """Build the chat arguments for combined NER and entity linking."""
+        return dict(
             model=self.name,
             messages=[
                 {"role": "system", "content": combined_system_prompt},
                 {"role": "user", "content": combined_user_prompt(text)}
             ],
-            format=ELTagList.model_json_schema()
+            format=_ELTAGLIST_SCHEMA,
+            keep_alive=self.keep_alive,
+            options=self.options
         )
-        
+    
+    def _ner_request(self, text: str) -> dict:
+        """Build the chat arguments for NER."""
+        return dict(
+            model=self.name,
+            messages=[
+                {"role": "system", "content": ner_system_prompt},
+                {"role": "user", "content": ner_user_prompt(text)}
+            ],
+            keep_alive=self.keep_alive,
+            options=self.options
+        )
+    
+    def _linking_request(self, nerful_text: str) -> dict:
+        """Build the chat arguments for entity linking."""
+        return dict(
+            model=self.name,
+            messages=[
+                {"role": "system", "content": linking_system_prompt},
+                {"role": "user", "content": linking_user_prompt(nerful_text)}
+            ],
+            format=_ELTAGLIST_SCHEMA,
+            keep_alive=self.keep_alive,
+            options=self.options
+        )
+    
+    @staticmethod
+    def _response_content(response: dict) -> str:
+        """Extract the message content from a response, dropping any reasoning preamble."""
         if response is None:
             raise RuntimeError("Received None response from model")
+        return response["message"]["content"].rpartition("</think>")[2].strip()
+    
+    @staticmethod
+    def _locate_tags(raw_text: str, content: str, fallback: bool) -> list[ELTagExtend]:
+        """Parse linked tags from a response and attach their offsets in raw_text."""
+        filtered_tags = _VALIDATE(content).tags
         
-        content = response["message"]["content"]
-        if "</think>" in content:
-            content = content.split("</think>")[-1].strip()
-        
-        filtered_tags = ELTagList.model_validate_json(content).tags
+        offsets = find_tag_offsets(
+            raw_text, [tag.text.lower() for tag in filtered_tags], fallback=fallback
+        )
         
-        raw_text = text.lower()
-        result = []
-        last_idx = 0
+        return [
+            ELTagExtend(
+                text=tag.text, 
+                uri=tag.uri, 
+                beginIndex=start, 
+                endIndex=start + len(tag.text)
+            )
+            for tag, start in zip(filtered_tags, offsets)
+            if start is not None
+        ]
+    
+    def _parse_combined_response(self, text: str, response: dict) -> list[ELTagExtend]:
+        """Turn a combined NER+EL response into tags with offsets in text."""
+        return self._locate_tags(text.lower(), self._response_content(response), fallback=True)
+    
+    def _parse_linking_response(self, raw_text: str, response: dict) -> list[ELTagExtend]:
+        """Turn a linking response into tags with offsets in the lowercased untagged text."""
+        return self._locate_tags(raw_text, self._response_content(response), fallback=False)
+    
+    def run_combined_ner_and_linking(self, text: str) -> list[ELTagExtend]:
+        """
+        Run NER and entity linking in a single LLM call.
         
-        for tag in filtered_tags:
-            try:
-                start = raw_text.index(tag.text.lower(), last_idx)
-                end = start + len(tag.text)
-                last_idx = end
-                result.append(ELTagExtend(
-                    text=tag.text, 
-                    uri=tag.uri, 
-                    beginIndex=start, 
-                    endIndex=end
-                ))
-            except ValueError:
-                try:
-                    start = raw_text.index(tag.text.lower())
-                    end = start + len(tag.text)
-                    result.append(ELTagExtend(
-                        text=tag.text, 
-                        uri=tag.uri, 
-                        beginIndex=start, 
-                        endIndex=end
-                    ))
-                except ValueError:
-                    continue
+        This approach is more efficient as it requires only one API call,
+        and the model can use context from NER to inform linking decisions.
         
-        return result
+        Args:
+            text: Input text to process
+            
+        Returns:
+            List of ELTagExtend objects with entity info and Wikipedia URIs
+        """
+        response = self._call_with_retry(self.client.chat, **self._combined_request(text))
+        return self._parse_combined_response(text, response)
     
     def run_ner(self, text: str) -> str:
         """
@@ -127,70 +253,181 @@ class EnhancedOllamaGPT(OllamaGPT):
         Returns:
             Text with entities tagged using [START_ENT] and [END_ENT]
         """
-        response = self._call_with_retry(
-            ollama.chat,
-            model=self.name,
-            messages=[
-                {"role": "system", "content": ner_system_prompt},
-                {"role": "user", "content": ner_user_prompt(text)}
-            ]
-        )
-        
-        content = response["message"]["content"]
-        if "</think>" in content:
-            content = content.split("</think>")[-1].strip()
-        
-        return content
+        response = self._call_with_retry(self.client.chat, **self._ner_request(text))
+        return self._response_content(response)
     
-    def run_linking(self, nerful_text: str) -> list[ELTagExtend]:
+    def run_linking(self, nerful_text: str, raw_text: Optional[str] = None) -> list[ELTagExtend]:
         """
         Perform Entity Linking on NER-tagged text.
         
         Args:
             nerful_text: Text with [START_ENT] and [END_ENT] tags
+            raw_text: nerful_text already stripped of tags and lowercased,
+                if the caller has it (computed here otherwise)
             
         Returns:
             List of ELTagExtend objects
         """
-        response = self._call_with_retry(
-            ollama.chat,
-            model=self.name,
-            messages=[
-                {"role": "system", "content": linking_system_prompt},
-                {"role": "user", "content": linking_user_prompt(nerful_text)}
-            ],
-            format=ELTagList.model_json_schema()
-        )
+        if raw_text is None:
+            raw_text = strip_entity_markers(nerful_text).lower()
+        response = self._call_with_retry(self.client.chat, **self._linking_request(nerful_text))
+        return self._parse_linking_response(raw_text, response)
+    
+    def run_ner_and_linking(self, text: str) -> list[ELTagExtend]:
+        """
+        Run NER followed by entity linking on a text.
         
-        if response is None:
-            raise RuntimeError("Received None response from model")
+        Args:
+            text: Input text to process
+            
+        Returns:
+            List of ELTagExtend objects with entity info and Wikipedia URIs
+        """
+        return self._run_ner_then_linking(text)[1]
+    
+    def _run_ner_then_linking(self, text: str) -> tuple[str, list[ELTagExtend]]:
+        """
+        Run NER followed by entity linking, also returning the NER-tagged text.
         
-        content = response["message"]["content"]
-        if "</think>" in content:
-            content = content.split("</think>")[-1].strip()
+        The NER output is stripped of its tags once and handed to the
+        linking step, which reuses it to locate the linked entities.
+        """
+        ner_output = self.run_ner(text)
+        raw_text = strip_entity_markers(ner_output).lower()
+        return ner_output, self.run_linking(ner_output, raw_text)
+    
+    async def arun_combined_ner_and_linking(self, text: str) -> list[ELTagExtend]:
+        """Async version of :meth:`run_combined_ner_and_linking`."""
+        response = await self._acall_with_retry(**self._combined_request(text))
+        return self._parse_combined_response(text, response)
+    
+    async def arun_ner(self, text: str) -> str:
+        """Async version of :meth:`run_ner`."""
+        response = await self._acall_with_retry(**self._ner_request(text))
+        return self._response_content(response)
+    
+    async def arun_linking(self, nerful_text: str, raw_text: Optional[str] = None) -> list[ELTagExtend]:
+        """Async version of :meth:`run_linking`."""
+        if raw_text is None:
+            raw_text = strip_entity_markers(nerful_text).lower()
+        response = await self._acall_with_retry(**self._linking_request(nerful_text))
+        return self._parse_linking_response(raw_text, response)
+    
+    async def arun_ner_and_linking(self, text: str) -> list[ELTagExtend]:
+        """Async version of :meth:`run_ner_and_linking`."""
+        return (await self._arun_ner_then_linking(text))[1]
+    
+    async def _arun_ner_then_linking(self, text: str) -> tuple[str, list[ELTagExtend]]:
+        """Async version of :meth:`_run_ner_then_linking`."""
+        ner_output = await self.arun_ner(text)
+        raw_text = strip_entity_markers(ner_output).lower()
+        return ner_output, await self.arun_linking(ner_output, raw_text)
+    
+    async def _aprocess_text(
+        self,
+        text: str,
+        mode: Literal["combined", "separate"]
+    ) -> dict:
+        """Process a single text, capturing any failure in the result's error field."""
+        try:
+            if mode == "combined":
+                entities = await self.arun_combined_ner_and_linking(text)
+                ner_output = None
+            else:
+                ner_output, entities = await self._arun_ner_then_linking(text)
+            
+            return {
+                "text": text,
+                "ner_output": ner_output,
+                "entities": entities,
+                "error": None
+            }
+        except Exception as e:
+            return {
+                "text": text,
+                "ner_output": None,
+                "entities": [],
+                "error": str(e)
+            }
+    
+    async def iter_batch_async(
+        self,
+        texts: list[str],
+        concurrency: int = 32,
+        mode: Literal["combined", "separate"] = "combined",
+        show_progress: bool = True,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        desc: str = "Processing texts",
+        position: Optional[int] = None
+    ) -> AsyncIterator[tuple[int, dict]]:
+        """
+        Process multiple texts with asyncio, yielding results as they complete.
         
-        filtered_tags = ELTagList.model_validate_json(content).tags
+        All requests are issued from a single thread over one shared client,
+        with at most ``concurrency`` requests in flight at a time.
         
-        raw_text = nerful_text.replace("[START_ENT]", "").replace("[END_ENT]", "").lower()
+        Args:
+            texts: List of texts to process
+            concurrency: Maximum number of concurrent requests
+            mode: "combined" for single-call NER+EL, "separate" for two-stage
+            show_progress: Whether to show progress bar
+            progress_callback: Optional callback for progress updates
+            desc: Label for the progress bar
+            position: Fixed line of the progress bar, so bars of batches
+                running side by side do not overwrite each other
+            
+        Yields:
+            Tuples of (index in texts, result dictionary), in completion order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
         
-        result = []
-        last_idx = 0
+        async def process_single(idx: int, text: str) -> tuple[int, dict]:
+            async with semaphore:
+                return idx, await self._aprocess_text(text, mode)
         
-        for tag in filtered_tags:
-            try:
-                start = raw_text.index(tag.text.lower(), last_idx)
-                end = start + len(tag.text)
-                last_idx = end
-                result.append(ELTagExtend(
-                    text=tag.text, 
-                    uri=tag.uri, 
-                    beginIndex=start, 
-                    endIndex=end
-                ))
-            except ValueError:
-                continue
+        tasks = [asyncio.ensure_future(process_single(idx, text)) for idx, text in enumerate(texts)]
+        progress_bar = tqdm(total=len(texts), desc=desc, position=position) if show_progress else None
+        
+        try:
+            for completed, next_done in enumerate(asyncio.as_completed(tasks), start=1):
+                idx, result = await next_done
+                if progress_bar is not None:
+                    progress_bar.update(1)
+                if progress_callback:
+                    progress_callback(completed, len(texts))
+                yield idx, result
+        finally:
+            for task in tasks:
+                task.cancel()
+            if progress_bar is not None:
+                progress_bar.close()
+    
+    async def run_batch_async(
+        self,
+        texts: list[str],
+        concurrency: int = 32,
+        mode: Literal["combined", "separate"] = "combined",
+        show_progress: bool = True,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> list[dict]:
+        """
+        Run batch processing on multiple texts with asyncio.
         
-        return result
+        See :meth:`iter_batch_async` for the arguments.
+            
+        Returns:
+            List of result dictionaries, in the same order as texts
+        """
+        results = [None] * len(texts)
+        async for idx, result in self.iter_batch_async(
+            texts,
+            concurrency=concurrency,
+            mode=mode,
+            show_progress=show_progress,
+            progress_callback=progress_callback
+        ):
+            results[idx] = result
+        return results
     
     def run_batch(
         self,
@@ -203,9 +440,14 @@ class EnhancedOllamaGPT(OllamaGPT):
         """
         Run batch processing on multiple texts.
         
+        Synchronous wrapper around :meth:`run_batch_async`. When called from
+        a thread that already runs an event loop (e.g. a notebook), the batch
+        is run on a fresh loop in a helper thread. Every call runs on its own
+        loop, so the async client is closed before the loop ends.
+        
         Args:
             texts: List of texts to process
-            max_workers: Number of concurrent workers
+            max_workers: Number of concurrent requests
             mode: "combined" for single-call NER+EL, "separate" for two-stage
             show_progress: Whether to show progress bar
             progress_callback: Optional callback for progress updates
@@ -213,46 +455,22 @@ class EnhancedOllamaGPT(OllamaGPT):
         Returns:
             List of result dictionaries
         """
-        results = [None] * len(texts)
-        
-        def process_single(idx_text: tuple[int, str]) -> tuple[int, dict]:
-            idx, text = idx_text
+        async def run_and_close() -> list[dict]:
             try:
-                if mode == "combined":
-                    entities = self.run_combined_ner_and_linking(text)
-                    ner_output = None
-                else:
-                    ner_output = self.run_ner(text)
-                    entities = self.run_linking(ner_output)
-                
-                return idx, {
-                    "text": text,
-                    "ner_output": ner_output,
-                    "entities": entities,
-                    "error": None
-                }
-            except Exception as e:
-                return idx, {
-                    "text": text,
-                    "ner_output": None,
-                    "entities": [],
-                    "error": str(e)
-                }
+                return await self.run_batch_async(
+                    texts,
+                    concurrency=max_workers,
+                    mode=mode,
+                    show_progress=show_progress,
+                    progress_callback=progress_callback
+                )
+            finally:
+                await self.aclose()
         
-        indexed_texts = list(enumerate(texts))
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(process_single, item): item for item in indexed_texts}
-            
-            iterator = as_completed(futures)
-            if show_progress:
-                iterator = tqdm(iterator, total=len(texts), desc="Processing texts")
-            
-            for future in iterator:
-                idx, result = future.result()
-                results[idx] = result
-                if progress_callback:
-                    completed = sum(1 for r in results if r is not None)
-                    progress_callback(completed, len(texts))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(run_and_close())
         
-        return results
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, run_and_close()).result()
@@ -6,15 +6,21 @@ import ollama
 from tqdm import tqdm
 
 from app.ollama.models import ELTagExtend, ELTagList
+from app.ollama.tag_matching import find_tag_offsets, strip_entity_markers
 from app.prompts.simple_ollamagpt import ner_prompt, linking_prompt
 
+_ELTAGLIST_SCHEMA = ELTagList.model_json_schema()
+_VALIDATE = ELTagList.model_validate_json
+
 
 class OllamaGPT(ABC):
     """Base class for Ollama-based LLM services."""
     
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, client: Optional[ollama.Client] = None) -> None:
         self.name = name
-        ollama.pull(name)
+        # Pull through the client the service talks to, so a pinned host gets the model
+        self.client = client or ollama.Client()
+        self.client.pull(name)
     
     @abstractmethod
     def run_ner(self, text: str) -> str:
@@ -57,7 +63,7 @@ class SimpleOllamaGPT(OllamaGPT):
                     'content': message,
                 },
             ],
-            format=ELTagList.model_json_schema()
+            format=_ELTAGLIST_SCHEMA
         )
         if response is None:
             raise RuntimeError("Received None as a response from model")
@@ -67,17 +73,17 @@ class SimpleOllamaGPT(OllamaGPT):
         #     for x in re.findall(r"\[START_ENT\].+?\[END_ENT\]", nerful_text)
         # )
         # [tag for tag in ELTagList.model_validate_json(response.message.content).tags if tag.text.lower() in ner_tags]
-        filtered_tags = ELTagList.model_validate_json(response.message.content).tags
+        filtered_tags = _VALIDATE(response.message.content).tags
 
-        raw_text = nerful_text.replace("[START_ENT]", "").replace("[END_ENT]", "").lower()
+        raw_text = strip_entity_markers(nerful_text).lower()
+
+        offsets = find_tag_offsets(raw_text, [tag.text.lower() for tag in filtered_tags])
 
         result = []
-        last_idx = 0
-        for tag in filtered_tags:
-            start = raw_text.index(tag.text.lower(), last_idx)
-            end = start + len(tag.text)
-            last_idx = end
-            result.append(ELTagExtend(text=tag.text, uri=tag.uri, beginIndex=start, endIndex=end))
+        for tag, start in zip(filtered_tags, offsets):
+            if start is None:
+                raise ValueError(f"Tagged entity {tag.text!r} not found in text")
+            result.append(ELTagExtend(text=tag.text, uri=tag.uri, beginIndex=start, endIndex=start + len(tag.text)))
         return result
 
     def run_ner(self, text: str) -> str:
@@ -92,7 +98,7 @@ class SimpleOllamaGPT(OllamaGPT):
                 'content': message,
             },
         ])
-        return response['message']['content'].split("</think>")[-1]
+        return response['message']['content'].rpartition("</think>")[2]
 
     def run_ner_and_linking(self, text: str) -> list[ELTagExtend]:
         """
@@ -151,20 +157,19 @@ class SimpleOllamaGPT(OllamaGPT):
                     "error": str(e)
                 }
         
-        indexed_texts = list(enumerate(texts))
-        
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(process_single, item): item for item in indexed_texts}
+            futures = {executor.submit(process_single, (idx, text)): idx for idx, text in enumerate(texts)}
             
             iterator = as_completed(futures)
             if show_progress:
                 iterator = tqdm(iterator, total=len(texts), desc="Processing texts")
             
+            completed = 0
             for future in iterator:
                 idx, result = future.result()
                 results[idx] = result
+                completed += 1
                 if progress_callback:
-                    completed = sum(1 for r in results if r is not None)
                     progress_callback(completed, len(texts))
         
         return results
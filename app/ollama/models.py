@@ -1,15 +1,32 @@
-from pydantic import BaseModel
+from typing import Union
 
+import msgspec
 
-class ELTag(BaseModel):
+
+class ELTag(msgspec.Struct, frozen=True, gc=False):
     text: str
     uri: str
 
 
-class ELTagExtend(ELTag):
+class ELTagExtend(ELTag, frozen=True, gc=False):
     beginIndex: int
     endIndex: int
 
 
-class ELTagList(BaseModel):
+class ELTagList(msgspec.Struct, frozen=True):
     tags: list[ELTag]
+
+    @classmethod
+    def model_json_schema(cls) -> dict:
+        """JSON schema of the model, e.g. for the ``format`` of structured Ollama output."""
+        _, components = msgspec.json.schema_components([cls], ref_template="#/$defs/{name}")
+        schema = components.pop(cls.__name__)
+        return {**schema, "$defs": components}
+
+    @classmethod
+    def model_validate_json(cls, data: Union[str, bytes]) -> "ELTagList":
+        """Decode and validate a JSON document into an ELTagList."""
+        return _ELTAGLIST_DECODER.decode(data)
+
+
+_ELTAGLIST_DECODER = msgspec.json.Decoder(ELTagList)
@@ -0,0 +1,70 @@
+import re
+from bisect import bisect_left
+from typing import Optional
+
+import ahocorasick
+
+_ENT_MARKER_RE = re.compile(r"\[(?:START|END)_ENT\]")
+
+
+def strip_entity_markers(nerful_text: str) -> str:
+    """Remove [START_ENT] and [END_ENT] markers from NER-tagged text in a single pass."""
+    return _ENT_MARKER_RE.sub("", nerful_text)
+
+
+def find_tag_offsets(
+    raw_text: str,
+    tag_texts: list[str],
+    fallback: bool = False
+) -> list[Optional[int]]:
+    """
+    Locate tag texts returned by the model in the source text.
+
+    All occurrences of every distinct tag text are collected in a single
+    Aho-Corasick pass over the text. Tags are then matched in order, each one
+    at its first unused occurrence starting at or after the end of the
+    previously matched tag. Every occurrence is assigned at most once, so a
+    repeated entity name maps to successive mentions instead of the same span.
+
+    Args:
+        raw_text: Lowercased text to search in
+        tag_texts: Lowercased tag texts, in the order returned by the model
+        fallback: If a tag has no unused occurrence after the previous match,
+            use its first unused occurrence before it (without advancing)
+
+    Returns:
+        Start offset for each tag text, or None if it could not be matched.
+        Empty tag texts are never matched.
+    """
+    patterns = dict.fromkeys(tag_text for tag_text in tag_texts if tag_text)
+    if not patterns:
+        return [None] * len(tag_texts)
+
+    automaton = ahocorasick.Automaton()
+    for pattern in patterns:
+        automaton.add_word(pattern, pattern)
+    automaton.make_automaton()
+
+    occurrences: dict[str, list[int]] = {}
+    for end, pattern in automaton.iter(raw_text):
+        occurrences.setdefault(pattern, []).append(end - len(pattern) + 1)
+
+    offsets = []
+    last_idx = 0
+    for tag_text in tag_texts:
+        starts = occurrences.get(tag_text)
+        if not starts:
+            offsets.append(None)
+            continue
+
+        pos = bisect_left(starts, last_idx)
+        if pos < len(starts):
+            start = starts.pop(pos)
+            last_idx = start + len(tag_text)
+            offsets.append(start)
+        elif fallback:
+            offsets.append(starts.pop(0))
+        else:
+            offsets.append(None)
+
+    return offsets
@@ -10,6 +10,13 @@ Each entity should have:
 
 Focus on entities that can be linked to Wikipedia. Skip generic terms or concepts without clear Wikipedia pages."""
 
+_PROMPT_PREFIX = 'Identify and link all named entities in this text to Wikipedia:\n\n"'
+
+_PROMPT_SUFFIX = """"
+
+For each entity, determine the most likely Wikipedia article based on the full context of the sentence.
+For ambiguous names (like "John" or "David"), use context clues to identify the correct person/entity."""
+
 
 def get_user_prompt(text: str) -> str:
     """
@@ -21,9 +28,4 @@ def get_user_prompt(text: str) -> str:
     Returns:
         The formatted user prompt string.
     """
-    return f"""Identify and link all named entities in this text to Wikipedia:
-
-"{text}"
-
-For each entity, determine the most likely Wikipedia article based on the full context of the sentence.
-For ambiguous names (like "John" or "David"), use context clues to identify the correct person/entity."""
+    return _PROMPT_PREFIX + text + _PROMPT_SUFFIX
@@ -3,6 +3,13 @@ For each entity marked with [START_ENT] and [END_ENT] tags, find the correct Wik
 Consider the full context of the sentence to disambiguate entities.
 Return a JSON object with a "tags" key containing linked entities."""
 
+_PROMPT_PREFIX = 'Link each tagged entity to its Wikipedia article:\n\n"'
+
+_PROMPT_SUFFIX = """"
+
+Return JSON with:
+{"tags": [{"text": "entity_text", "uri": "https://en.wikipedia.org/wiki/..."}]}"""
+
 
 def get_user_prompt(nerful_text: str) -> str:
     """
@@ -14,9 +21,4 @@ def get_user_prompt(nerful_text: str) -> str:
     Returns:
         The formatted user prompt string.
     """
-    return f"""Link each tagged entity to its Wikipedia article:
-
-"{nerful_text}"
-
-Return JSON with:
-{{"tags": [{{"text": "entity_text", "uri": "https://en.wikipedia.org/wiki/..."}}]}}"""
+    return _PROMPT_PREFIX + nerful_text + _PROMPT_SUFFIX
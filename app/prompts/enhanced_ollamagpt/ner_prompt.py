@@ -4,6 +4,16 @@ Focus on: people, organizations, locations, events, works of art, products.
 Do NOT tag common nouns, adjectives, or generic terms.
 Return ONLY the tagged text, no explanations."""
 
+_PROMPT_PREFIX = "Tag all named entities in this text:\n\n"
+
+_PROMPT_SUFFIX = """
+
+Example:
+Input: "Einstein worked at Princeton University."
+Output: "[START_ENT]Einstein[END_ENT] worked at [START_ENT]Princeton University[END_ENT]."
+
+Now tag the entities:"""
+
 
 def get_user_prompt(text: str) -> str:
     """
@@ -15,12 +25,4 @@ def get_user_prompt(text: str) -> str:
     Returns:
         The formatted user prompt string.
     """
-    return f"""Tag all named entities in this text:
-
-{text}
-
-Example:
-Input: "Einstein worked at Princeton University."
-Output: "[START_ENT]Einstein[END_ENT] worked at [START_ENT]Princeton University[END_ENT]."
-
-Now tag the entities:"""
+    return _PROMPT_PREFIX + text + _PROMPT_SUFFIX
@@ -2,6 +2,18 @@ JSON_STRUCT = "{text:<tagged_text_AS_IS>, uri:<wikipedia url linking tagged text
 
 EXAMPLE_OUTPUT = '{tags: [{text: "Angelina", uri:"https://en.wikipedia.org/wiki/Angelina_Jolie"}, {text: "Jon", uri: "https://en.wikipedia.org/wiki/Jon_Voight"}, {text: "Brad", uri: "https://en.wikipedia.org/wiki/Brad_Pitt"}]}'
 
+_PROMPT_PREFIX = """
+Keeping in mind the entire context of the sentence, for each entity tagged with [START_ENT] and [END_ENT] tags in this sentence:
+'"""
+
+_PROMPT_SUFFIX = f"""'
+Generate a tag json object of the following structure:
+{JSON_STRUCT}
+Return a json object with a list of these tags as the 'tags' key.
+Examples:
+- 'Angelina, her father Jon, and her partner Brad never played together in the same movie.' -> {EXAMPLE_OUTPUT}
+"""
+
 
 def get_prompt(nerful_text: str) -> str:
     """
@@ -13,12 +25,4 @@ def get_prompt(nerful_text: str) -> str:
     Returns:
         The formatted prompt string.
     """
-    return f"""
-Keeping in mind the entire context of the sentence, for each entity tagged with [START_ENT] and [END_ENT] tags in this sentence:
-'{nerful_text}'
-Generate a tag json object of the following structure:
-{JSON_STRUCT}
-Return a json object with a list of these tags as the 'tags' key.
-Examples:
-- 'Angelina, her father Jon, and her partner Brad never played together in the same movie.' -> {EXAMPLE_OUTPUT}
-"""
+    return _PROMPT_PREFIX + nerful_text + _PROMPT_SUFFIX
@@ -1,117 +1,171 @@
 import argparse
-import json
+import asyncio
 import sys
 import csv
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
+
+import msgspec
+from tqdm import tqdm
 
 from app.data.dataset import EntityLinkingDataset, load_all_datasets
-from app.ollama.llm_service import OllamaGPT
 from app.ollama.enhanced_llm_service import EnhancedOllamaGPT
-from app.ollama.models import ELTagExtend
-from app.utils.evaluate_results import calculate_metrics_from_file
-
-def serialize_tag(tag: ELTagExtend) -> dict:
-    """Convert ELTagExtend to dictionary for JSON serialization."""
-    return {
-        "text": tag.text,
-        "uri": tag.uri,
-        "beginIndex": tag.beginIndex,
-        "endIndex": tag.endIndex
-    }
-
-def process_dataset(
+from app.utils.evaluate_results import MetricsAccumulator
+
+# Encodes the ELTagExtend structs in result records natively, without
+# converting each tag to a dict first
+_RESULT_ENCODER = msgspec.json.Encoder()
+
+async def process_dataset(
     dataset: EntityLinkingDataset,
-    model: OllamaGPT,
+    model: EnhancedOllamaGPT,
     max_workers: int = 4,
-    limit: Optional[int] = None
-) -> list[dict]:
-    if limit:
-        items = [dataset[i] for i in range(min(limit, len(dataset)))]
-    else:
-        items = [dataset[i] for i in range(len(dataset))]
+    limit: Optional[int] = None,
+    position: Optional[int] = None
+) -> AsyncIterator[dict]:
+    """
+    Yield one result record per sample, in dataset order.
     
+    Samples complete out of order; a finished one is held back only until
+    every earlier sample has finished, so the buffer stays about as small as
+    the number of requests in flight. ``position`` fixes the line of the
+    progress bar when several datasets are processed at once.
+    """
+    # One bulk conversion of the Arrow rows instead of a slice per index;
+    # iter_batch_async needs a sized list, which only holds references
+    count = min(limit, len(dataset)) if limit else len(dataset)
+    items = dataset.get_batch(0, count)
     texts = [item["corpus"] for item in items]
     
-    print(f"Processing {len(texts)} samples from {dataset.dataset_name}...")
-    
-    batch_results = model.run_batch(texts, max_workers=max_workers)
-    
-    results = []
-    for item, batch_result in zip(items, batch_results):
-        result = {
-            "id": item["id"],
-            "corpus": item["corpus"],
-            "source_file": item["source_file"],
-            "ground_truth": [serialize_tag(tag) for tag in item["ground_truth"]],
-            "predicted": {
-                "ner_output": batch_result["ner_output"],
-                "entities": [serialize_tag(tag) for tag in batch_result["entities"]] if batch_result["entities"] else [],
-                "error": batch_result["error"]
-            }
-        }
-        results.append(result)
+    tqdm.write(f"Processing {len(texts)} samples from {dataset.dataset_name}...")
     
-    return results
+    pending: dict[int, dict] = {}
+    next_idx = 0
+    async for idx, batch_result in model.iter_batch_async(
+        texts,
+        concurrency=max_workers,
+        desc=dataset.dataset_name,
+        position=position
+    ):
+        pending[idx] = batch_result
+        while next_idx in pending:
+            batch_result = pending.pop(next_idx)
+            item = items[next_idx]
+            next_idx += 1
+            yield {
+                "id": item["id"],
+                "corpus": item["corpus"],
+                "source_file": item["source_file"],
+                "ground_truth": item["ground_truth"],
+                "predicted": {
+                    "ner_output": batch_result["ner_output"],
+                    "entities": batch_result["entities"] or [],
+                    "error": batch_result["error"]
+                }
+            }
+
+async def track_metrics(
+    results: AsyncIterator[dict],
+    metrics: MetricsAccumulator
+) -> AsyncIterator[dict]:
+    """Pass result records through unchanged, adding each one to ``metrics``."""
+    async for result in results:
+        predicted = result["predicted"]
+        metrics.add(
+            (tag.uri for tag in result["ground_truth"]),
+            () if predicted["error"] else (tag.uri for tag in predicted["entities"])
+        )
+        yield result
 
-def save_results(
-    results: list[dict],
+async def save_results(
+    results: AsyncIterator[dict],
     dataset_name: str,
     model_name: str,
-    results_dir: Path
-) -> Path:
-    results_dir.mkdir(parents=True, exist_ok=True)
+    results_dir: Path,
+    timestamp: Optional[datetime] = None
+) -> tuple[Path, int, int, int]:
+    """
+    Stream result records to a JSON file as they arrive.
     
-    output = {
-        "metadata": {
-            "dataset": dataset_name,
-            "model": model_name,
-            "timestamp": datetime.now().isoformat(),
-            "total_samples": len(results),
-            "successful": sum(1 for r in results if r["predicted"]["error"] is None),
-            "failed": sum(1 for r in results if r["predicted"]["error"] is not None)
-        },
-        "results": results
-    }
+    Records are written one per line inside the "results" array, in the
+    order they arrive (dataset order for :func:`process_dataset`), so the file
+    fills up while the model is still working and a partial run is kept on
+    disk. The "metadata" object follows once every record has been written.
+    Its timestamp defaults to the time the last record was written. If the
+    stream fails or is cancelled, the file is still closed as valid JSON with
+    the records written so far and "complete" set to false in the metadata.
+    
+    Returns:
+        Tuple of (output path, total samples, successful, failed), counted
+        in the same pass that writes the records
+    """
+    results_dir.mkdir(parents=True, exist_ok=True)
     
     safe_model_name = model_name.replace(":", "_").replace("/", "_")
     output_path = results_dir / f"{dataset_name}_{safe_model_name}_results.json"
     
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    total = 0
+    successful = 0
+    complete = False
+    with open(output_path, "wb") as f:
+        f.write(b'{"results": [\n')
+        try:
+            async for result in results:
+                if total:
+                    f.write(b",\n")
+                f.write(_RESULT_ENCODER.encode(result))
+                total += 1
+                if result["predicted"]["error"] is None:
+                    successful += 1
+            complete = True
+        finally:
+            failed = total - successful
+            metadata = {
+                "dataset": dataset_name,
+                "model": model_name,
+                "timestamp": timestamp or datetime.now(),
+                "total_samples": total,
+                "successful": successful,
+                "failed": failed,
+                "complete": complete
+            }
+            f.write(b'\n],\n"metadata": ')
+            f.write(msgspec.json.format(_RESULT_ENCODER.encode(metadata), indent=2))
+            f.write(b"}\n")
     
-    print(f"Results saved to: {output_path}")
-    return output_path
+    tqdm.write(f"Results saved to: {output_path}")
+    return output_path, total, successful, failed
 
 def append_metrics_to_csv(
     metrics: dict,
     dataset_name: str,
     model_name: str,
-    results_dir: Path
+    results_dir: Path,
+    timestamp: Optional[datetime] = None
 ):
     safe_model_name = model_name.replace(":", "_").replace("/", "_")
 
     csv_filename = f"{safe_model_name}_{dataset_name}_results.csv"
     csv_path = results_dir / csv_filename
     
-    file_exists = csv_path.exists()
-    
     with open(csv_path, mode='a', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
 
-        if not file_exists:
+        # An append-mode handle starts at the end of the file, so position 0
+        # means the file is new or empty; no separate existence check needed
+        if f.tell() == 0:
             writer.writerow(["Timestamp", "Precision", "Recall", "F1"])
         
         writer.writerow([
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            (timestamp or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
             f"{metrics['precision']:.4f}",
             f"{metrics['recall']:.4f}",
             f"{metrics['f1']:.4f}"
         ])
     
-    print(f"Metrics appended to: {csv_path}")
-    print(f"  -> F1: {metrics['f1']:.4f} | P: {metrics['precision']:.4f} | R: {metrics['recall']:.4f}") 
+    tqdm.write(f"Metrics appended to: {csv_path}")
+    tqdm.write(f"  -> F1: {metrics['f1']:.4f} | P: {metrics['precision']:.4f} | R: {metrics['recall']:.4f}") 
 
 def main():
     parser = argparse.ArgumentParser(
@@ -149,25 +203,56 @@ def main():
             sys.exit(1)
         datasets = {args.dataset: EntityLinkingDataset(dataset_path)}
     
-    for name, dataset in datasets.items():
-        print(f"\n{'='*60}")
-        print(f"Processing dataset: {name} ({len(dataset)} samples)")
-        print(f"{'='*60}")
+    async def process_one(name: str, dataset: EntityLinkingDataset, position: int):
+        # Progress bars of concurrent datasets stay live, so messages go
+        # through tqdm.write to be printed above them
+        tqdm.write(f"\n{'='*60}\nProcessing dataset: {name} ({len(dataset)} samples)\n{'='*60}")
 
         results = process_dataset(
             dataset, 
             model, 
             max_workers=args.max_workers,
-            limit=args.limit
+            limit=args.limit,
+            position=position
         )
         
-        output_path = save_results(results, name, args.model, results_dir)
+        # Score the records as they stream past so the metrics neither keep
+        # them in memory nor re-read the file
+        metrics_accumulator = MetricsAccumulator()
+        # One timestamp per run, shared by the results file and the CSV row
+        timestamp = datetime.now()
+        _, total, successful, failed = await save_results(
+            track_metrics(results, metrics_accumulator), name, args.model, results_dir, timestamp=timestamp
+        )
+        tqdm.write(f"{name}: {successful}/{total} samples succeeded, {failed} failed")
 
         try:
-            metrics = calculate_metrics_from_file(output_path)
-            append_metrics_to_csv(metrics, name, args.model, results_dir)
+            metrics = metrics_accumulator.finalize()
+            append_metrics_to_csv(metrics, name, args.model, results_dir, timestamp=timestamp)
         except Exception as e:
-            print(f"Error calculating metrics for {name}: {e}")
+            tqdm.write(f"Error calculating metrics for {name}: {e}")
+
+    async def process_all():
+        # Datasets are independent, so their LLM requests share the model and
+        # overlap; each one keeps at most max_workers requests in flight.
+        # A failing dataset must not cut the others short, so every one runs
+        # to completion before its failure is reported and the client closed
+        try:
+            outcomes = await asyncio.gather(
+                *(
+                    process_one(name, dataset, position)
+                    for position, (name, dataset) in enumerate(datasets.items())
+                ),
+                return_exceptions=True
+            )
+            for name, outcome in zip(datasets, outcomes):
+                if isinstance(outcome, Exception):
+                    print(f"Error processing dataset {name}: {outcome}")
+        finally:
+            # Close the shared connection pool on the loop that opened it
+            await model.aclose()
+
+    asyncio.run(process_all())
 
     print(f"\nAll processing complete. Check {results_dir} for details.")
 
@@ -1,40 +1,69 @@
-import json
 from pathlib import Path
+from typing import Iterable
 
-def calculate_metrics_from_file(file_path: Path) -> dict:
+import orjson
+
+class MetricsAccumulator:
     """
-    Calculate precision, recall, and F1-score from a results JSON file.
+    Collect the URIs of result records one document at a time and compute
+    precision, recall, and F1-score from them at the end.
+
+    Only (document index, URI) pairs are kept, so records can be dropped as
+    soon as their URIs have been added.
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
 
-    true_positives = 0
-    false_positives = 0
-    false_negatives = 0
+    def __init__(self) -> None:
+        self._gt_pairs = set()
+        self._pred_pairs = set()
+        self._doc_count = 0
 
-    for item in data['results']:
-        gt_uris = {tag['uri'] for tag in item['ground_truth']}
+    def add(self, gt_uris: Iterable[str], pred_uris: Iterable[str]) -> None:
+        """
+        Add the URIs of one document. Pass no predicted URIs for a document
+        whose prediction failed.
+        """
+        # Pairing each URI with its document index keeps the per-document
+        # set semantics while the counting runs over the whole dataset at once
+        doc_idx = self._doc_count
+        self._doc_count += 1
+        self._gt_pairs.update((doc_idx, uri) for uri in gt_uris)
+        self._pred_pairs.update((doc_idx, uri) for uri in pred_uris)
 
+    def finalize(self) -> dict:
+        """Precision, recall, and F1-score over every record added so far."""
+        true_positives = len(self._gt_pairs & self._pred_pairs)
+        false_positives = len(self._pred_pairs - self._gt_pairs)
+        false_negatives = len(self._gt_pairs - self._pred_pairs)
+
+        precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
+        recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
+        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+
+        return {
+            "precision": precision,
+            "recall": recall,
+            "f1": f1
+        }
+
+def calculate_metrics(results: Iterable[dict]) -> dict:
+    """
+    Calculate precision, recall, and F1-score from result records.
+    """
+    accumulator = MetricsAccumulator()
+    for item in results:
         pred_data = item.get('predicted', {})
-        if pred_data.get('error'):
-            pred_uris = set()
-        else:
-            pred_uris = {tag['uri'] for tag in pred_data.get('entities', [])}
-
-        tp = len(gt_uris.intersection(pred_uris))
-        fp = len(pred_uris - gt_uris)
-        fn = len(gt_uris - pred_uris)
-
-        true_positives += tp
-        false_positives += fp
-        false_negatives += fn
-
-    precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
-    recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
-    f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-
-    return {
-        "precision": precision,
-        "recall": recall,
-        "f1": f1
-    }
\ No newline at end of file
+        pred_tags = [] if pred_data.get('error') else pred_data.get('entities', [])
+        accumulator.add(
+            (tag['uri'] for tag in item['ground_truth']),
+            (tag['uri'] for tag in pred_tags)
+        )
+    return accumulator.finalize()
+
+def calculate_metrics_from_file(file_path: Path) -> dict:
+    """
+    Calculate precision, recall, and F1-score from a results JSON file.
+    """
+    with open(file_path, 'rb') as f:
+        data = orjson.loads(f.read())
+
+    return calculate_metrics(data['results'])
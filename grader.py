@@ -1,9 +1,40 @@
 import json
+import os
 import re
-from typing import List, Dict, Any
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator
+
+import ijson
+import orjson
+
+_WIKI_RE = re.compile(r"https?://[^/]+/wiki/")
+_DBP_RE = re.compile(r"https?://[^/]+/resource/")
+
+# Results files above this size are stream-parsed instead of loaded at once
+STREAMING_THRESHOLD_BYTES = 100 * 1024 * 1024
 
 
 # --- 1. Helper Function: URI Normalization (UPDATED for DBpedia/Wikipedia) ---
+def _strip_site_prefix(uri: str, marker: str, pattern: re.Pattern) -> str:
+    """
+    Strips a leading 'http(s)://<host><marker>' from a URI with plain string
+    operations, falling back to removing every match of the regex pattern
+    when the URI does not have that simple shape.
+    """
+    # Fast path: scheme, non-empty host, marker, and no further URL in the title
+    if uri.startswith(("http://", "https://")):
+        host_start = uri.index("://") + 3
+        host_end = uri.find("/", host_start)
+        if host_end > host_start and uri.startswith(marker, host_end):
+            rest = uri[host_end + len(marker) :]
+            if "://" not in rest:
+                return rest
+
+    return pattern.sub("", uri)
+
+
+@lru_cache(maxsize=None)
 def normalize_uri(uri: str) -> str:
     """
     Normalizes a URI (supporting both Wikipedia and DBpedia patterns) to a
@@ -17,24 +48,25 @@ def normalize_uri(uri: str) -> str:
 
     # 1. Handle Wikipedia URIs (strips protocol/domain/wiki/)
     if "wikipedia.org/wiki/" in uri:
-        normalized = re.sub(r"https?://[^/]+/wiki/", "", uri)
+        normalized = _strip_site_prefix(uri, "/wiki/", _WIKI_RE)
 
     # 2. Handle DBpedia URIs (strips protocol/domain/resource/)
     elif "dbpedia.org/resource/" in uri:
-        normalized = re.sub(r"https?://[^/]+/resource/", "", uri)
+        normalized = _strip_site_prefix(uri, "/resource/", _DBP_RE)
 
     # Final cleanup (remove fragments/queries)
-    normalized = normalized.split("#")[0].split("?")[0]
+    normalized = normalized.split("#", 1)[0].split("?", 1)[0]
 
     return normalized
 
 
 # --- 2. Core Function: Metric Computation (UNCHANGED) ---
-def compute_entity_linking_metrics(data: List[Dict[str, Any]]) -> Dict[str, float]:
+def compute_entity_linking_metrics(data: Iterable[Dict[str, Any]]) -> Dict[str, float]:
     """
     Computes Micro-F1, Precision, and Recall for Entity Linking data.
     A match requires an exact span match AND a normalized URI match
     (using the updated normalize_uri function).
+    The documents are consumed in a single pass, so any iterable works.
     """
     global_tp = 0
     global_fp = 0
@@ -46,35 +78,31 @@ def compute_entity_linking_metrics(data: List[Dict[str, Any]]) -> Dict[str, floa
         predicted_data = doc.get("predicted", {})
         predicted = predicted_data.get("entities", []) if predicted_data else []
 
-        # Track matched indices to prevent double-counting
-        matched_gt_indices = set()
-        matched_pred_indices = set()
-
-        # True Positives (TP) calculation
-        for i_pred, pred_entity in enumerate(predicted):
-            for i_gt, gt_entity in enumerate(ground_truth):
-                if i_gt in matched_gt_indices:
-                    continue
-
-                # Exact Span Match
-                span_match = pred_entity.get("beginIndex") == gt_entity.get("beginIndex") and pred_entity.get("endIndex") == gt_entity.get(
-                    "endIndex"
-                )
-
-                # Normalized URI Match (using the updated function)
-                uri_match = normalize_uri(pred_entity.get("uri", "")) == normalize_uri(gt_entity.get("uri", ""))
-
-                if span_match and uri_match:
-                    global_tp += 1
-                    matched_gt_indices.add(i_gt)
-                    matched_pred_indices.add(i_pred)
-                    break
+        # Failed documents have no usable predictions: every ground truth entity is missed
+        if predicted_data and predicted_data.get("error"):
+            global_fn += len(ground_truth)
+            continue
+
+        # Count unmatched ground truth entities by (beginIndex, endIndex, normalized URI)
+        unmatched_gt = Counter(
+            (g.get("beginIndex"), g.get("endIndex"), normalize_uri(g.get("uri", ""))) for g in ground_truth
+        )
+
+        # True Positives (TP) calculation: each prediction consumes one
+        # unmatched ground truth entity with an exact span and URI match
+        doc_tp = 0
+        for p in predicted:
+            pred_key = (p.get("beginIndex"), p.get("endIndex"), normalize_uri(p.get("uri", "")))
+            if unmatched_gt[pred_key] > 0:
+                unmatched_gt[pred_key] -= 1
+                doc_tp += 1
+        global_tp += doc_tp
 
         # False Negatives (FN): Ground truth entities that were not matched
-        global_fn += len(ground_truth) - len(matched_gt_indices)
+        global_fn += len(ground_truth) - doc_tp
 
         # False Positives (FP): Predicted entities that did not match any ground truth entity
-        global_fp += len(predicted) - len(matched_pred_indices)
+        global_fp += len(predicted) - doc_tp
 
     # Final Metric Calculation
     total_predicted = global_tp + global_fp
@@ -99,37 +127,98 @@ def compute_entity_linking_metrics(data: List[Dict[str, Any]]) -> Dict[str, floa
 
 
 # --- 3. Orchestration Function: Load and Evaluate (UNCHANGED) ---
+def _stream_results(file_path: str, fields: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream-parses the documents of a large results file one at a time with ijson.
+    The top-level 'metadata' value is stored as-is in `fields['metadata']` during the
+    same pass, so it is available once the generator is exhausted.
+    """
+    with open(file_path, "rb") as f:
+        # ijson.items(f, "results.item") is not enough: the pipeline writes the metadata
+        # after the results, so reading it that way would take a second full pass.
+        events = ijson.parse(f, use_float=True)
+
+        # Validate the top-level shape like the in-memory path does
+        _, first_event, _ = next(events, (None, None, None))
+        if first_event == "start_array":
+            item_prefix, results_seen = "item", True
+        elif first_event == "start_map":
+            item_prefix, results_seen = "results.item", False
+        else:
+            raise ValueError("JSON file content is neither a list nor a dictionary with a 'results' key.")
+
+        builder = None
+        depth = 0
+        for prefix, event, value in events:
+            if builder is None:
+                if prefix == "results" and item_prefix == "results.item":
+                    if event == "start_array":
+                        results_seen = True
+                    elif event != "end_array":
+                        raise ValueError("JSON dictionary must contain a 'results' key with a list of documents.")
+                    continue
+                if prefix not in (item_prefix, "metadata") or event in ("map_key", "end_map", "end_array"):
+                    continue
+                # Start building a document or the metadata value
+                target = prefix
+                builder = ijson.ObjectBuilder()
+
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            if depth:
+                continue
+
+            if target == "metadata":
+                fields["metadata"] = builder.value
+            else:
+                yield builder.value
+            builder = None
+
+    if not results_seen:
+        raise ValueError("JSON dictionary must contain a 'results' key with a list of documents.")
+
+
 def load_json_and_evaluate(file_path: str) -> Dict[str, Any]:
     """
     Loads data from a JSON file, handles nested structures (like 'results'),
     runs the Entity Linking evaluation, and returns the computed metrics.
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        metadata = {}
-        evaluation_data = []
-
-        if isinstance(data, dict):
-            metadata = data.get("metadata", {})
-            if "results" in data and isinstance(data["results"], list):
-                evaluation_data = data["results"]
-            else:
-                raise ValueError("JSON dictionary must contain a 'results' key with a list of documents.")
-        elif isinstance(data, list):
-            evaluation_data = data
+        # Filled in while the metrics consume the stream
+        streamed_fields = {}
+        if os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES:
+            metadata = {}
+            evaluation_data = _stream_results(file_path, streamed_fields)
         else:
-            raise ValueError("JSON file content is neither a list nor a dictionary with a 'results' key.")
+            with open(file_path, "rb") as f:
+                data = orjson.loads(f.read())
+
+            metadata = {}
+            evaluation_data = []
+
+            if isinstance(data, dict):
+                metadata = data.get("metadata", {})
+                if "results" in data and isinstance(data["results"], list):
+                    evaluation_data = data["results"]
+                else:
+                    raise ValueError("JSON dictionary must contain a 'results' key with a list of documents.")
+            elif isinstance(data, list):
+                evaluation_data = data
+            else:
+                raise ValueError("JSON file content is neither a list nor a dictionary with a 'results' key.")
 
         # Run the evaluation function
         metrics = compute_entity_linking_metrics(evaluation_data)
+        metadata = streamed_fields.get("metadata", metadata)
 
         return {"file_path": file_path, "metadata": metadata, "metrics": metrics}
 
     except FileNotFoundError:
         return {"error": f"File not found at path: {file_path}"}
-    except json.JSONDecodeError:
+    except (orjson.JSONDecodeError, ijson.JSONError):
         return {"error": f"Error decoding JSON from file: {file_path}. Check file format."}
     except ValueError as e:
         return {"error": str(e)}